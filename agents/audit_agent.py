@@ -1,6 +1,8 @@
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import xml.etree.ElementTree as ET
 from typing import Optional, List, Dict, Any
 from urllib.parse import urljoin
@@ -19,10 +21,18 @@ model = genai.GenerativeModel("gemini-2.0-flash")
 class SiteVisibilityAuditor:
     def __init__(self, base_url: str):
         self.base_url = base_url if base_url.startswith("http") else "https://" + base_url
+        # One keep-alive pool for every file fetched from the audited host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=Retry(total=2, backoff_factor=0.3))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
 
     def fetch_url(self, path: str) -> str:
         try:
-            res = requests.get(urljoin(self.base_url, path), timeout=10)
+            res = self.session.get(urljoin(self.base_url, path), timeout=10)
             if res.status_code == 200:
                 return res.text.strip()
         except Exception:
@@ -214,7 +224,10 @@ class AuditAgent:
             state["error"] = "Missing company name, website content, or BASE_URL for audit."
             return state
         site_auditor = SiteVisibilityAuditor(company_name)
-        technical_audit_report = site_auditor.full_audit()
+        try:
+            technical_audit_report = site_auditor.full_audit()
+        finally:
+            site_auditor.close()
         content_audit_report = content_audit_gemini(site_metrics, blog_data)
 
         state["audit_report"] = {
@@ -38,12 +38,10 @@ class CompatibilityAgent:
             logger.warning("No valid pages found in website_content_individual for compatibility analysis.")
             return state
 
-        # Build a single combined string with URL labels
-        full_site_content = ""
-        # Build a single combined string with URL labels
-        full_site_content = ""
-        for page in site_pages:
-            page_block = f"""[URL: {page["url"]}]
+        # Build a single combined string with URL labels; every page goes into the
+        # one prompt below, so the whole site is scored in a single call
+        full_site_content = "".join(
+            f"""[URL: {page["url"]}]
 {' '.join(page["titles"]["h1"])}
 {' '.join(page["titles"]["h2"])}
 {' '.join(page["titles"]["h3"])}
@@ -52,7 +50,8 @@ class CompatibilityAgent:
 {' '.join(page["lists"]["numbered_lists"])}
 
 """
-            full_site_content += page_block
+            for page in site_pages
+        )
 
         prompt = f"""
 You are an expert in content analysis and generative engine optimization (GEO).
@@ -227,7 +227,9 @@ class PeriodicTableAgent:
             
             # Create prompt and get response from the model
             prompt = self._create_aeo_prompt(content_text)
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(
+                prompt, generation_config={"response_mime_type": "application/json"}
+            )
             content = response.text.strip()
             
             logger.info("Parsing JSON response...")
@@ -1,11 +1,20 @@
 import os
+import re
 import json
 import asyncio
 import time
 import logging
-from urllib.parse import urlparse, urljoin, urlunparse
-from typing import Dict, List, Optional, TYPE_CHECKING, Any
-from parsel import Selector
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING, Any, Union
+import orjson
+import xxhash
+from lxml import etree
+from lxml.html import HtmlElement, HTMLParser
 from playwright.async_api import async_playwright
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
@@ -20,17 +29,136 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Scheme and netloc of an absolute URL, equivalent to urlparse(url).netloc
+_URL_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*)://([^/?#]*)')
+_SKIP_EXTENSIONS = frozenset({
+    'pdf', 'jpg', 'jpeg', 'png', 'gif', 'svg', 'webp', 'ico',
+    'css', 'js', 'woff', 'woff2', 'mp4', 'webm'
+})
+
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Documents larger than this are skipped instead of being pulled over CDP and parsed
+_MAX_PAGE_BYTES = 5_000_000
+
+# XPath expressions are compiled once at import and reused for every page
+_H1_TEXT = etree.XPath('//h1/text()')
+_H2_TEXT = etree.XPath('//h2/text()')
+_H3_TEXT = etree.XPath('//h3/text()')
+_PARAGRAPHS = etree.XPath('//p[not(ancestor::footer)]')
+_BULLET_TEXT = etree.XPath('//ul[not(ancestor::nav or ancestor::header or ancestor::footer)]//li/text()')
+_NUMBERED_TEXT = etree.XPath('//ol//li/text()')
+# FAQ containers are marked by "faq" anywhere in their class or id, in any case (e.g. "FAQ-list")
+_FAQ_CONTAINERS = etree.XPath(
+    '//*[contains(translate(@class, "FAQ", "faq"), "faq") or contains(translate(@id, "FAQ", "faq"), "faq")]'
+)
+_FAQ_QUESTIONS = etree.XPath('.//h2/text() | .//h3/text() | .//dt/text()')
+_FAQ_ANSWER = etree.XPath(
+    '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::p[1]/text() | '
+    '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::div[1]/text() | '
+    '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::dd[1]/text()'
+)
+_DEFINITION_LISTS = etree.XPath('//dl')
+_DT_TEXT = etree.XPath('./dt/text()')
+_DD_TEXT = etree.XPath('./dd/text()')
+# Button-styled links/buttons and conversion links, matched in a single document walk
+_CTA_TEXT = etree.XPath(
+    '//*[self::a[contains(@class, "btn") or contains(@class, "cta") or '
+    'contains(@href, "contact") or contains(@href, "signup") or contains(@href, "register") or '
+    'contains(@href, "buy") or contains(@href, "purchase") or contains(@href, "order")] or '
+    'self::button[contains(@class, "btn") or contains(@class, "cta")]]/text()'
+)
+_ARTICLES = etree.XPath('//article')
+_BLOG_PARAGRAPH_TEXT = etree.XPath(
+    '//article//p[not(ancestor::footer) and string-length(text()) > 20]/text() | '
+    '//main//p[not(ancestor::footer) and string-length(text()) > 20]/text()'
+)
+_BLOG_DATE = etree.XPath(
+    '//time/text() | '
+    '//meta[@name="date" or @property="article:published_time"]/@content | '
+    '//*[contains(@class, "date") or contains(@class, "published")]/text()'
+)
+_HREFS = etree.XPath('//a/@href')
+
+# Visited URLs are tracked by their 64-bit hash to keep memory flat on wide crawls
+def _url_key(url: str) -> int:
+    return xxhash.xxh64_intdigest(url.encode("utf-8"))
+
 if TYPE_CHECKING:
     from .schemas import ResearchState
 
+# HTML parsing runs in worker processes shared by every crawl in this process.
+# They are spawned rather than forked: a forked child would inherit the
+# Playwright driver's pipes (so the driver never sees EOF and the crawl hangs
+# on exit) along with the server's threads and queued log handlers.
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def parse_pool() -> ProcessPoolExecutor:
+    """Return the shared parse pool, starting it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_parse_worker,
+        )
+    return _parse_pool
+
+
+def _init_parse_worker() -> None:
+    """Keep spawned workers to warnings; re-importing this module sets DEBUG logging."""
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+async def close_parse_pool() -> None:
+    """Shut the parse pool down without blocking the event loop."""
+    global _parse_pool
+    pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+
+def parse_html(content: Union[str, bytes], base_url: Optional[str] = None, encoding: Optional[str] = None) -> HtmlElement:
+    """Parse an HTML document into an lxml tree, tolerating empty or broken markup.
+
+    Raw response bytes are decoded with `encoding` (the Content-Type charset)
+    when given, as UTF-8 when they are valid UTF-8, and otherwise by libxml2
+    from the document's own <meta charset>.
+    """
+    if isinstance(content, str):
+        content = content.replace("\x00", "").encode("utf8")
+        encoding = "utf8"
+    parser = None
+    if encoding:
+        try:
+            parser = HTMLParser(recover=True, encoding=encoding)
+        except LookupError:
+            logger.debug(f"Unknown charset {encoding!r} for {base_url}")
+    if parser is None:
+        try:
+            content.decode("utf8")
+            parser = HTMLParser(recover=True, encoding="utf8")
+        except UnicodeDecodeError:
+            parser = HTMLParser(recover=True)
+    body = content.strip() or b"<html/>"
+    root = etree.fromstring(body, parser=parser, base_url=base_url)
+    if root is None:
+        root = etree.fromstring(b"<html/>", parser=parser, base_url=base_url)
+    return root
+
 class ScraperAgent:
-    def __init__(self):
+    def __init__(self, requests_per_second: float = 10.0):
         logger.info("Initializing ScraperAgent")
-        self.visited = set()
+        self.visited: Set[int] = set()
         self.rejected_urls = []
         self.domain_cache = {}
         self.semaphore = asyncio.Semaphore(20)  # Concurrent pages
         self.load_times = []
+        self.requests_per_second = requests_per_second
+        self._next_fetch_at: Dict[str, float] = {}  # Per-host earliest start time of the next fetch
         logger.debug("ScraperAgent initialized with empty visited set, rejected_urls list, domain_cache, and semaphore limit of 20")
 
     def clean_text(self, text: str) -> str:
@@ -54,63 +182,63 @@ class ScraperAgent:
     def normalize_url(self, url: str) -> str:
         logger.debug(f"Normalizing URL: {url}")
         parsed = urlparse(url)
-        normalized = urlunparse((parsed.scheme, parsed.netloc, parsed.path.rstrip('/'), '', '', ''))
+        scheme, netloc = parsed.scheme.lower(), parsed.netloc.lower()
+        default_port = _DEFAULT_PORTS.get(scheme)
+        if default_port and netloc.endswith(default_port):
+            netloc = netloc[:-len(default_port)]
+        normalized = urlunparse((scheme, netloc, parsed.path.rstrip('/'), '', '', ''))
         logger.debug(f"Normalized URL: {url} -> {normalized}")
         return normalized
 
-    def is_valid_url(self, url: str, domain: str) -> bool:
-        logger.debug(f"Checking if URL is valid: {url} for domain: {domain}")
-        parsed = urlparse(url)
-        url_domain = self.normalize_domain(parsed.netloc)
-        base_domain = self.normalize_domain(domain)
-        is_valid = (
-            url_domain == base_domain and
-            url not in self.visited and
-            not any(url.endswith(ext) for ext in ('.pdf', '.jpg', '.png', '.gif', '.css', '.js', '.woff', '.woff2', '.mp4', '.webm')) and
-            '#' not in url
-        )
-        if not is_valid:
-            logger.debug(f"URL rejected: {url}")
-            self.rejected_urls.append(url)
-        else:
-            logger.debug(f"URL valid: {url}")
+    def make_link_filter(self, domain: str, can_fetch: Optional[Callable[[str], bool]] = None) -> Callable[[str], bool]:
+        """Build a URL filter specialised for one crawl of `domain`.
+
+        A link passes if it has no fragment or skipped file extension, is on
+        the crawled domain (ignoring "www.") and has not been visited. The base
+        domain, the skipped extensions and the visited set are bound once per
+        crawl so the per-link check avoids urlparse and attribute lookups on
+        `self`. URLs refused by `can_fetch` (the site's robots.txt) are
+        rejected as well.
+        """
+        base = self.normalize_domain(domain)
+
+        def is_valid(url: str, _re=_URL_RE, _base=base, _skip=_SKIP_EXTENSIONS, _key=_url_key,
+                     _visited=self.visited, _reject=self.rejected_urls.append, _can_fetch=can_fetch) -> bool:
+            if (
+                '#' in url
+                or url.rpartition('.')[2].lower() in _skip
+                or (m := _re.match(url)) is None
+                or m.group(2).lower().replace("www.", "").strip() != _base
+                or _key(url) in _visited
+                or (_can_fetch is not None and not _can_fetch(url))
+            ):
+                _reject(url)
+                return False
+            return True
+
         return is_valid
 
-    def extract_lists(self, selector: Selector) -> Dict[str, List[str]]:
+    def extract_lists(self, root: HtmlElement) -> Dict[str, List[str]]:
         logger.debug("Extracting lists from page")
-        bullets = [
-            self.clean_text(li) for li in selector.xpath('//ul[not(ancestor::nav or ancestor::header or ancestor::footer)]//li/text()').getall()
-            if li.strip()
-        ]
-        numbers = [
-            self.clean_text(li) for li in selector.xpath('//ol//li/text()').getall()
-            if li.strip()
-        ]
+        bullets = [self.clean_text(li) for li in _BULLET_TEXT(root) if li.strip()]
+        numbers = [self.clean_text(li) for li in _NUMBERED_TEXT(root) if li.strip()]
         logger.debug(f"Extracted {len(bullets)} bullet points and {len(numbers)} numbered list items")
         return {"bullet_points": bullets, "numbered_lists": numbers}
 
-    def extract_faq(self, selector: Selector) -> List[Dict[str, str]]:
+    def extract_faq(self, root: HtmlElement) -> List[Dict[str, str]]:
         logger.debug("Extracting FAQs from page")
         faqs = []
-        faq_containers = selector.xpath('//*[contains(@class, "faq") or contains(@id, "faq")]')
+        faq_containers = _FAQ_CONTAINERS(root)
         logger.debug(f"Found {len(faq_containers)} FAQ containers")
         for container in faq_containers:
-            questions = container.xpath('.//h2/text() | .//h3/text() | .//dt/text()').getall()
-            for q in questions:
+            for q in _FAQ_QUESTIONS(container):
                 question = self.clean_text(q)
-                answer = self.clean_text(
-                    container.xpath(
-                        '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::p[1]/text() | '
-                        '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::div[1]/text() | '
-                        '(.//h2|.//h3|.//dt)[text()=$q]/following-sibling::dd[1]/text()',
-                        q=q
-                    ).get(default='')
-                )
+                answer = self.clean_text(next(iter(_FAQ_ANSWER(container, q=q)), ''))
                 if question and answer:
                     faqs.append({"question": question, "answer": answer})
                     logger.debug(f"Extracted FAQ: Q: {question} | A: {answer}")
-        for dl in selector.xpath('//dl'):
-            for dt, dd in zip(dl.xpath('./dt/text()').getall(), dl.xpath('./dd/text()').getall()):
+        for dl in _DEFINITION_LISTS(root):
+            for dt, dd in zip(_DT_TEXT(dl), _DD_TEXT(dl)):
                 q, a = self.clean_text(dt), self.clean_text(dd)
                 if q and a:
                     faqs.append({"question": q, "answer": a})
@@ -118,29 +246,22 @@ class ScraperAgent:
         logger.debug(f"Total FAQs extracted: {len(faqs)}")
         return faqs
 
-    def extract_ctas(self, selector: Selector) -> List[str]:
+    def extract_ctas(self, root: HtmlElement) -> List[str]:
         logger.debug("Extracting CTAs from page")
-        selectors = [
-            '//a[contains(@class, "btn") or contains(@class, "cta")]/text()',
-            '//button[contains(@class, "btn") or contains(@class, "cta")]/text()',
-            '//a[contains(@href, "contact") or contains(@href, "signup") or contains(@href, "register") or '
-            'contains(@href, "buy") or contains(@href, "purchase") or contains(@href, "order")]/text()'
-        ]
         ctas = set()
-        for sel in selectors:
-            for txt in selector.xpath(sel).getall():
-                txt = self.clean_text(txt)
-                if txt:
-                    ctas.add(txt)
-                    logger.debug(f"Extracted CTA: {txt}")
+        for txt in _CTA_TEXT(root):
+            txt = self.clean_text(txt)
+            if txt:
+                ctas.add(txt)
+                logger.debug(f"Extracted CTA: {txt}")
         logger.debug(f"Total unique CTAs extracted: {len(ctas)}")
         return list(ctas)
 
-    def extract_blogs(self, selector: Selector, url: str) -> Dict[str, Any]:
+    def extract_blogs(self, root: HtmlElement, url: str) -> Dict[str, Any]:
         logger.debug(f"Extracting blog data from URL: {url}")
         blog_indicators = ['/blog/', '/news/', '/articles/', '/post/', '/posts/']
         is_blog = any(indicator in url.lower() for indicator in blog_indicators) or \
-                  selector.xpath('//article').get() is not None
+                  bool(_ARTICLES(root))
         logger.debug(f"Is blog page: {is_blog}")
 
         if not is_blog:
@@ -148,26 +269,15 @@ class ScraperAgent:
             return {}
 
         title = self.clean_text(
-            selector.xpath('//h1/text()').get(default='') or
-            selector.xpath('//h2/text()').get(default='')
+            next(iter(_H1_TEXT(root)), '') or
+            next(iter(_H2_TEXT(root)), '')
         )
         logger.debug(f"Blog title: {title}")
 
-        content = [
-            self.clean_text(p) for p in selector.xpath(
-                '//article//p[not(ancestor::footer) and string-length(text()) > 20]/text() | '
-                '//main//p[not(ancestor::footer) and string-length(text()) > 20]/text()'
-            ).getall()
-        ]
+        content = [self.clean_text(p) for p in _BLOG_PARAGRAPH_TEXT(root)]
         logger.debug(f"Extracted {len(content)} paragraphs of blog content")
 
-        date = self.clean_text(
-            selector.xpath(
-                '//time/text() | '
-                '//meta[@name="date" or @property="article:published_time"]/@content | '
-                '//*[contains(@class, "date") or contains(@class, "published")]/text()'
-            ).get(default='')
-        )
+        date = self.clean_text(next(iter(_BLOG_DATE(root)), ''))
         logger.debug(f"Blog publication date: {date}")
 
         if title or content:
@@ -182,22 +292,25 @@ class ScraperAgent:
         logger.debug("No title or content found, returning empty dict")
         return {}
 
-    def extract_page_data(self, url: str, selector: Selector) -> Dict:
+    def extract_paragraphs(self, root: HtmlElement) -> List[str]:
+        # Clean each paragraph's full text once, then keep the substantial ones
+        cleaned = (self.clean_text(p.text_content()) for p in _PARAGRAPHS(root))
+        return [text for text in cleaned if len(text) > 20]
+
+    def extract_page_data(self, url: str, root: HtmlElement) -> Dict:
         logger.debug(f"Extracting page data for URL: {url}")
-        blog_data = self.extract_blogs(selector, url)
+        blog_data = self.extract_blogs(root, url)
         page_data = {
             "url": url,
             "titles": {
-                "h1": [self.clean_text(h) for h in selector.xpath('//h1/text()').getall()],
-                "h2": [self.clean_text(h) for h in selector.xpath('//h2/text()').getall()],
-                "h3": [self.clean_text(h) for h in selector.xpath('//h3/text()').getall()]
+                "h1": [self.clean_text(h) for h in _H1_TEXT(root)],
+                "h2": [self.clean_text(h) for h in _H2_TEXT(root)],
+                "h3": [self.clean_text(h) for h in _H3_TEXT(root)]
             },
-            "paragraphs": [
-                self.clean_text(p) for p in selector.xpath('//p[not(ancestor::footer) and string-length(text()) > 20]/text()').getall()
-            ],
-            "lists": self.extract_lists(selector),
-            "faq": self.extract_faq(selector),
-            "call_to_actions": self.extract_ctas(selector),
+            "paragraphs": self.extract_paragraphs(root),
+            "lists": self.extract_lists(root),
+            "faq": self.extract_faq(root),
+            "call_to_actions": self.extract_ctas(root),
             "blog": blog_data if blog_data else None
         }
         logger.debug(f"Page data extracted: {url} - H1: {len(page_data['titles']['h1'])}, "
@@ -206,47 +319,102 @@ class ScraperAgent:
                      f"CTAs: {len(page_data['call_to_actions'])}, Blog: {bool(page_data['blog'])}")
         return page_data
 
-    def get_links(self, selector: Selector, current_url: str, domain: str) -> List[str]:
+    def filter_links(self, hrefs: Iterable[str], current_url: str, is_valid: Callable[[str], bool]) -> List[str]:
         logger.debug(f"Extracting links from URL: {current_url}")
         links = set()
-        for href in selector.xpath('//a/@href').getall():
-            if href.startswith('#'):
+        # hrefs were made absolute at parse time, so in-page anchors resolve to current_url
+        for href in hrefs:
+            full_url = self.normalize_url(href.split('#')[0])
+            if full_url == current_url:
                 logger.debug(f"Skipping anchor link: {href}")
                 continue
-            full_url = self.normalize_url(urljoin(current_url, href).split('#')[0])
             full_url = full_url.replace('fframeworks', 'frameworks')
-            if self.is_valid_url(full_url, domain):
+            if is_valid(full_url):
                 links.add(full_url)
                 logger.debug(f"Valid link added: {full_url}")
         logger.debug(f"Total unique links extracted: {len(links)}")
         return list(links)
 
-    async def scrape_and_extract(self, url: str, domain: str, browser_context, retries: int = 2) -> Dict:
+    async def load_robots(self, browser_context, base_url: str) -> Optional[Callable[[str], bool]]:
+        """Fetch robots.txt for the crawl and return a can_fetch check, or None if unavailable."""
+        parsed = urlparse(base_url)
+        robots_url = urlunparse((parsed.scheme, parsed.netloc, '/robots.txt', '', '', ''))
+        try:
+            response = await browser_context.request.get(robots_url, timeout=10000)
+            if not response.ok:
+                logger.debug(f"No robots.txt at {robots_url} (status {response.status})")
+                return None
+            robots = RobotFileParser(robots_url)
+            robots.parse((await response.text()).splitlines())
+        except Exception as e:
+            logger.warning(f"Could not load {robots_url}: {str(e)}")
+            return None
+        logger.debug(f"Loaded robots.txt from {robots_url}")
+        return lambda url: robots.can_fetch("*", url)
+
+    async def throttle(self, url: str) -> None:
+        """Space out fetch starts per host to at most `requests_per_second`."""
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next_fetch_at.get(host, 0.0))
+        self._next_fetch_at[host] = slot + 1 / self.requests_per_second
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def parse_page(self, url: str, content: Union[str, bytes], encoding: Optional[str] = None) -> Tuple[Dict, List[str]]:
+        """Parse a page and return its extracted data and absolute hrefs (unfiltered)."""
+        root = parse_html(content, url, encoding)
+        root.make_links_absolute(url, resolve_base_href=True, handle_failures="discard")
+        return self.extract_page_data(url, root), [str(href) for href in _HREFS(root)]
+
+    async def scrape_and_extract(self, url: str, is_valid: Callable[[str], bool], browser_context, retries: int = 2) -> Dict:
         logger.info(f"Scraping URL: {url}")
         async with self.semaphore:
             for attempt in range(retries):
                 try:
+                    await self.throttle(url)
                     start_time = time.time()
                     logger.debug(f"Creating new page for URL: {url}, attempt {attempt + 1}/{retries}")
                     page = await browser_context.new_page()
+                    encoding = None
                     await page.route("**/*.{png,jpg,gif,css,js,woff,woff2,mp4,webm}", lambda route: route.abort())
                     logger.debug(f"Blocked resource types for {url}")
                     try:
-                        await page.goto(url, timeout=20000, wait_until="domcontentloaded")
+                        response = await page.goto(url, timeout=20000, wait_until="domcontentloaded")
                         logger.debug(f"Successfully loaded {url}")
                     except PlaywrightTimeoutError:
                         logger.warning(f"Timeout on {url}, capturing partial content")
                         content = await page.content()
                     else:
-                        content = await page.content()
+                        headers = response.headers if response else {}
+                        content_type = headers.get("content-type", "").lower()
+                        if content_type and "html" not in content_type:
+                            logger.info(f"Skipping non-HTML response for {url}: {content_type}")
+                            self.rejected_urls.append(url)
+                            return {"url": url, "skip": True}
+                        content_length = headers.get("content-length", "")
+                        if content_length.isdigit() and int(content_length) > _MAX_PAGE_BYTES:
+                            logger.info(f"Skipping oversized response for {url}: {content_length} bytes")
+                            self.rejected_urls.append(url)
+                            return {"url": url, "skip": True}
+                        # Raw HTML from the network stack avoids serialising the live DOM.
+                        # It stays bytes: Response.text() is a strict UTF-8 decode, so
+                        # lxml decodes it from the declared or <meta> charset instead.
+                        if response:
+                            content = await response.body()
+                            if m := _CHARSET.search(content_type):
+                                encoding = m.group(1)
+                        else:
+                            content = await page.content()
                     await page.close()
                     load_time = time.time() - start_time
                     self.load_times.append(load_time)
                     logger.debug(f"Page load time: {load_time:.2f} seconds")
 
-                    selector = Selector(text=content)
-                    data = self.extract_page_data(url, selector)
-                    links = self.get_links(selector, url, domain)
+                    # Parsing is CPU-bound: hand it to the parse pool and only filter
+                    # links here, since is_valid reads the crawl's visited set.
+                    data, hrefs = await _parse_in_pool(url, content, encoding)
+                    links = self.filter_links(hrefs, url, is_valid)
                     logger.info(f"Successfully scraped {url} - Extracted data and {len(links)} links")
                     return {
                         "url": url,
@@ -267,72 +435,102 @@ class ScraperAgent:
         logger.error(f"Failed to scrape {url} after {retries} attempts")
         return {"url": url, "error": "Max retries reached"}
 
-    async def scrape_site(self, base_url: str, max_pages: int = 100) -> List[Dict]:
+    async def scrape_site(
+        self,
+        base_url: str,
+        max_pages: int = 100,
+        pages_path: Optional[str] = None,
+        on_page: Optional[Callable[[Dict], None]] = None,
+    ) -> int:
+        """Crawl `base_url` breadth-first and return the number of pages scraped.
+
+        Pages are not kept: each one is handed to `on_page` and, when `pages_path`
+        is given, appended to that file as one NDJSON line as soon as it is scraped.
+        """
         logger.info(f"Starting site scrape for {base_url} with max_pages: {max_pages}")
         self.visited.clear()
         self.rejected_urls.clear()
         self.load_times.clear()
         logger.debug("Cleared visited, rejected_urls, and load_times")
-        scraped_pages = []
+        scraped = 0
         if not urlparse(base_url).scheme:
             base_url = "https://" + base_url
             logger.debug(f"Added https scheme to base_url: {base_url}")
 
         domain = self.normalize_domain(urlparse(base_url).netloc)
-        queue = [self.normalize_url(base_url)]
+        queue = deque([self.normalize_url(base_url)])
+        queued = {_url_key(queue[0])}
         logger.debug(f"Initialized queue with base URL: {base_url}")
 
-        async with async_playwright() as p:
-            logger.debug("Launching Playwright browser")
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            )
-            logger.debug("Browser context created with user agent")
-
-            while queue and len(scraped_pages) < max_pages:
-                batch_size = min(20, max_pages - len(scraped_pages), len(queue))
-                logger.debug(f"Processing batch of {batch_size} URLs")
-                urls_to_fetch = []
-                for _ in range(batch_size):
-                    if not queue:
+        pages_file = None
+        if pages_path:
+            os.makedirs(os.path.dirname(pages_path) or ".", exist_ok=True)
+            pages_file = open(pages_path, "wb")
+
+        try:
+            async with async_playwright() as p:
+                logger.debug("Launching Playwright browser")
+                browser = await p.chromium.launch(headless=True)
+                context = await browser.new_context(
+                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+                )
+                logger.debug("Browser context created with user agent")
+                is_valid = self.make_link_filter(domain, await self.load_robots(context, base_url))
+
+                # Keep up to 20 pages in flight and refill as each one finishes,
+                # rather than waiting for the slowest page of a fixed batch.
+                in_flight = set()
+                while (queue or in_flight) and scraped < max_pages:
+                    while queue and len(in_flight) < 20 and scraped + len(in_flight) < max_pages:
+                        url = queue.popleft()
+                        key = _url_key(url)
+                        if key not in self.visited:
+                            self.visited.add(key)
+                            in_flight.add(asyncio.create_task(self.scrape_and_extract(url, is_valid, context)))
+                            logger.debug(f"Added URL to fetch: {url}")
+                    if not in_flight:
                         break
-                    url = queue.pop(0)
-                    if url not in self.visited:
-                        urls_to_fetch.append(url)
-                        self.visited.add(url)
-                        logger.debug(f"Added URL to fetch: {url}")
-
-                tasks = [self.scrape_and_extract(url, domain, context) for url in urls_to_fetch]
-                logger.debug(f"Created {len(tasks)} scraping tasks")
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for result in results:
-                    if isinstance(result, Exception):
-                        logger.error(f"Exception in batch processing: {str(result)}")
-                        continue
-                    if "error" not in result:
-                        scraped_pages.append(result["data"])
-                        logger.info(f"Successfully scraped page: {result['url']}, total pages: {len(scraped_pages)}")
-                        for link in result["links"]:
-                            if len(scraped_pages) + len(queue) < max_pages and link not in self.visited and link not in queue:
-                                queue.append(link)
-                                logger.debug(f"Added new link to queue: {link}")
-                    else:
-                        logger.warning(f"Failed to scrape {result['url']}: {result['error']}")
-                        self.rejected_urls.append(result["url"])
 
-            await context.close()
-            await browser.close()
-            logger.debug("Closed browser context and browser")
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is not None:
+                            logger.error(f"Exception in batch processing: {str(task.exception())}")
+                            continue
+                        result = task.result()
+                        if result.get("skip"):
+                            continue
+                        if "error" not in result:
+                            scraped += 1
+                            if on_page:
+                                on_page(result["data"])
+                            if pages_file:
+                                pages_file.write(orjson.dumps(result["data"]) + b"\n")
+                                pages_file.flush()
+                            logger.info(f"Successfully scraped page: {result['url']}, total pages: {scraped}")
+                            for link in result["links"]:
+                                key = _url_key(link)
+                                if scraped + len(in_flight) + len(queue) < max_pages and key not in queued and key not in self.visited:
+                                    queue.append(link)
+                                    queued.add(key)
+                                    logger.debug(f"Added new link to queue: {link}")
+                        else:
+                            logger.warning(f"Failed to scrape {result['url']}: {result['error']}")
+                            self.rejected_urls.append(result["url"])
+
+                await context.close()
+                await browser.close()
+                logger.debug("Closed browser context and browser")
+        finally:
+            if pages_file:
+                pages_file.close()
 
         os.makedirs("output", exist_ok=True)
         logger.debug("Created output directory")
-        with open("output/rejected_urls.json", "w", encoding="utf-8") as f:
-            json.dump(self.rejected_urls, f, indent=2)
+        with open("output/rejected_urls.json", "wb") as f:
+            f.write(orjson.dumps(self.rejected_urls, option=orjson.OPT_INDENT_2))
             logger.info(f"Saved {len(self.rejected_urls)} rejected URLs to output/rejected_urls.json")
-        logger.info(f"Completed site scrape, total pages scraped: {len(scraped_pages)}")
-        return scraped_pages
+        logger.info(f"Completed site scrape, total pages scraped: {scraped}")
+        return scraped
 
     async def scrape_website(self, state: dict) -> dict:
         logger.info("Starting website scrape")
@@ -347,72 +545,52 @@ class ScraperAgent:
                 company_url = "https://" + company_url
                 logger.debug(f"Added https scheme to company_url: {company_url}")
 
-            pages = await self.scrape_site(company_url, max_pages=100)
-            logger.info(f"Scraped {len(pages)} pages")
+            # Each page is folded in as it is scraped: insertion-ordered dicts
+            # collect and deduplicate every field (FAQs and blogs keyed by tuple).
+            h1, h2, h3, paragraphs, bullets, numbers, ctas = {}, {}, {}, {}, {}, {}, {}
+            faqs, blogs = {}, {}
+
+            def compile_page(page: Dict) -> None:
+                h1.update(dict.fromkeys(page["titles"]["h1"]))
+                h2.update(dict.fromkeys(page["titles"]["h2"]))
+                h3.update(dict.fromkeys(page["titles"]["h3"]))
+                paragraphs.update(dict.fromkeys(page["paragraphs"]))
+                bullets.update(dict.fromkeys(page["lists"]["bullet_points"]))
+                numbers.update(dict.fromkeys(page["lists"]["numbered_lists"]))
+                ctas.update(dict.fromkeys(page["call_to_actions"]))
+                for faq in page["faq"]:
+                    faqs.setdefault((faq.get("question", ""), faq.get("answer", "")), faq)
+                blog = page["blog"]
+                if blog:
+                    blogs.setdefault((blog.get("url", ""), blog.get("title", "")), blog)
+                logger.debug(f"Processed page {page['url']} for compiled content")
 
-            os.makedirs("output", exist_ok=True)
-            with open("output/pages_with_content.json", "w", encoding="utf-8") as f:
-                json.dump(pages, f, indent=4, ensure_ascii=False)
-                logger.info("Saved individual page content to output/pages_with_content.json")
+            total_pages = await self.scrape_site(
+                company_url, max_pages=100, pages_path="output/pages_with_content.ndjson", on_page=compile_page
+            )
+            logger.info(f"Scraped {total_pages} pages")
+            logger.info("Streamed individual page content to output/pages_with_content.ndjson")
 
             compiled = {
                 "website_url": company_url,
-                "total_pages_scraped": len(pages),
+                "total_pages_scraped": total_pages,
                 "compiled_content": {
-                    "all_h1_titles": [],
-                    "all_h2_titles": [],
-                    "all_h3_titles": [],
-                    "all_paragraphs": [],
-                    "all_faq": [],
-                    "all_bullet_points": [],
-                    "all_numbered_lists": [],
-                    "all_call_to_actions": [],
-                    "all_blogs": []
+                    "all_h1_titles": list(h1),
+                    "all_h2_titles": list(h2),
+                    "all_h3_titles": list(h3),
+                    "all_paragraphs": list(paragraphs),
+                    "all_faq": list(faqs.values()),
+                    "all_bullet_points": list(bullets),
+                    "all_numbered_lists": list(numbers),
+                    "all_call_to_actions": list(ctas),
+                    "all_blogs": list(blogs.values())
                 }
             }
-            logger.debug("Initialized compiled content structure")
-
-            for page in pages:
-                compiled["compiled_content"]["all_h1_titles"].extend(page["titles"]["h1"])
-                compiled["compiled_content"]["all_h2_titles"].extend(page["titles"]["h2"])
-                compiled["compiled_content"]["all_h3_titles"].extend(page["titles"]["h3"])
-                compiled["compiled_content"]["all_paragraphs"].extend(page["paragraphs"])
-                compiled["compiled_content"]["all_faq"].extend(page["faq"])
-                compiled["compiled_content"]["all_bullet_points"].extend(page["lists"]["bullet_points"])
-                compiled["compiled_content"]["all_numbered_lists"].extend(page["lists"]["numbered_lists"])
-                compiled["compiled_content"]["all_call_to_actions"].extend(page["call_to_actions"])
-                if page["blog"]:
-                    compiled["compiled_content"]["all_blogs"].append(page["blog"])
-                logger.debug(f"Processed page {page['url']} for compiled content")
+            logger.debug(f"Compiled content: {len(faqs)} unique FAQs, {len(blogs)} unique blogs")
 
-            for key in compiled["compiled_content"]:
-                if key != "all_faq" and key != "all_blogs":
-                    compiled["compiled_content"][key] = list(dict.fromkeys(compiled["compiled_content"][key]))
-                    logger.debug(f"Deduplicated {key}: {len(compiled['compiled_content'][key])} items")
-
-            seen = set()
-            unique_faqs = []
-            for faq in compiled["compiled_content"]["all_faq"]:
-                key = (faq.get("question", ""), faq.get("answer", ""))
-                if key not in seen:
-                    seen.add(key)
-                    unique_faqs.append(faq)
-            compiled["compiled_content"]["all_faq"] = unique_faqs
-            logger.debug(f"Deduplicated FAQs: {len(unique_faqs)} unique FAQs")
-
-            seen = set()
-            unique_blogs = []
-            for blog in compiled["compiled_content"]["all_blogs"]:
-                key = (blog.get("url", ""), blog.get("title", ""))
-                if key not in seen:
-                    seen.add(key)
-                    unique_blogs.append(blog)
-            compiled["compiled_content"]["all_blogs"] = unique_blogs
-            logger.debug(f"Deduplicated blogs: {len(unique_blogs)} unique blogs")
-
-            with open("output/compiled_scraped_data.json", "w", encoding="utf-8") as f:
+            with open("output/compiled_scraped_data.json", "wb") as f:
                 logger.info("Writing compiled data to output/compiled_scraped_data.json")
-                json.dump(compiled, f, indent=4, ensure_ascii=False)
+                f.write(orjson.dumps(compiled, option=orjson.OPT_INDENT_2))
 
             state["website_content"] = compiled
             state["scraped_summary"] = {
@@ -430,9 +608,9 @@ class ScraperAgent:
             }
             logger.debug(f"Scraped summary: {json.dumps(state['scraped_summary'], indent=2)}")
 
-            with open("output/scraped_summary.json", "w", encoding="utf-8") as f:
+            with open("output/scraped_summary.json", "wb") as f:
                 logger.info("Writing summary to output/scraped_summary.json")
-                json.dump(state["scraped_summary"], f, indent=2, ensure_ascii=False)
+                f.write(orjson.dumps(state["scraped_summary"], option=orjson.OPT_INDENT_2))
 
             logger.info("Website scrape completed successfully")
             return state
@@ -440,4 +618,27 @@ class ScraperAgent:
         except Exception as e:
             logger.error(f"Scraping failed: {str(e)}")
             state["error"] = f"Scraping failed: {str(e)}"
-            return state
\ No newline at end of file
+            return state
+
+
+_worker_agent: Optional[ScraperAgent] = None
+
+
+def _parse_page_in_worker(url: str, content: Union[str, bytes], encoding: Optional[str] = None) -> Tuple[Dict, List[str]]:
+    """Parse-pool entry point; each worker process keeps its own extractor instance."""
+    global _worker_agent
+    if _worker_agent is None:
+        _worker_agent = ScraperAgent()
+    return _worker_agent.parse_page(url, content, encoding)
+
+
+async def _parse_in_pool(url: str, content: Union[str, bytes], encoding: Optional[str] = None) -> Tuple[Dict, List[str]]:
+    global _parse_pool
+    pool = parse_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, _parse_page_in_worker, url, content, encoding)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); the next attempt starts a fresh pool
+        if _parse_pool is pool:
+            _parse_pool = None
+        raise
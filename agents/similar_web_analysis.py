@@ -1,12 +1,14 @@
 import asyncio
 import json
 import logging
+import orjson
 import os
 import re
+import requests
 from typing import Dict, Any, Optional, TYPE_CHECKING
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
 
 if TYPE_CHECKING:
     from .schemas import ResearchState
@@ -16,6 +18,8 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+_DOMAIN_RE = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9](?:\.[a-zA-Z]{2,})+$')
+
 def reduce_error(existing: Optional[str], new: Optional[str]) -> Optional[str]:
     return existing or new
 
@@ -23,52 +27,111 @@ def reduce_similar_web_data(existing: Optional[dict], new: Optional[dict]) -> Op
     return existing or new
 
 class SimilarWebTrafficAgent:
+    # Browser state shared by every instance on the same event loop
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _lock: Optional[asyncio.Lock] = None
+    _playwright: Optional[Playwright] = None
+    _browser: Optional[Browser] = None
+    _context: Optional[BrowserContext] = None
+
     def __init__(self):
         self.api_url = "https://data.similarweb.com/api/v1/data?domain={domain}"
+        self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": self.user_agent, "Accept": "application/json"})
         logger.info("Initialized SimilarWebTrafficAgent")
 
+    def _format_site_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "site": {
+                "site_name": data.get("SiteName", ""),
+                "title": data.get("Title", ""),
+                "description": data.get("Description", "")
+            },
+            "engagement": data.get("Engagements", {}),
+            "traffic_sources": data.get("TrafficSources", {}),
+            "top_country_shares": data.get("TopCountryShares", []),
+            "estimated_monthly_visits": data.get("EstimatedMonthlyVisits", {}),
+            "top_keywords": data.get("TopKeywords", [])
+        }
+
+    def _http_fetch(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Fetch the JSON endpoint with a plain GET; None means the browser path is needed."""
+        url = self.api_url.format(domain=domain)
+        try:
+            resp = self.session.get(url, timeout=10)
+            if resp.ok and resp.headers.get("content-type", "").startswith("application/json"):
+                logger.info(f"Successfully fetched SimilarWeb data for {domain} via HTTP")
+                return self._format_site_data(resp.json())
+            logger.info(f"Plain HTTP fetch for {domain} returned {resp.status_code}, falling back to Playwright")
+        except (requests.RequestException, ValueError) as e:
+            logger.info(f"Plain HTTP fetch for {domain} failed ({e}), falling back to Playwright")
+        return None
+
+    async def _fetch_json(self, domain: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._http_fetch, domain) or await self._playwright_fetch(domain)
+
+    async def _ensure_context(self) -> BrowserContext:
+        """Launch Chromium once per event loop and share it across fetches and instances."""
+        cls = SimilarWebTrafficAgent
+        loop = asyncio.get_running_loop()
+        if cls._lock is None or cls._loop is not loop:
+            # Playwright objects are bound to the loop that created them
+            cls._lock, cls._loop = asyncio.Lock(), loop
+            cls._playwright = cls._browser = cls._context = None
+        async with cls._lock:
+            if cls._context is None:
+                cls._playwright = await async_playwright().start()
+                cls._browser = await cls._playwright.chromium.launch(headless=True)
+                cls._context = await cls._browser.new_context(user_agent=self.user_agent)
+                logger.info("Launched shared Playwright browser for SimilarWeb")
+        return cls._context
+
+    @classmethod
+    async def close(cls) -> None:
+        """Shut down the shared browser, if one was started on the running loop."""
+        if cls._loop is not asyncio.get_running_loop() or cls._browser is None:
+            return
+        await cls._browser.close()
+        await cls._playwright.stop()
+        cls._playwright = cls._browser = cls._context = None
+
     async def _playwright_fetch(self, domain: str) -> Dict[str, Any]:
         url = self.api_url.format(domain=domain)
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+            context = await self._ensure_context()
+            # Fetch through the browser's network stack without rendering a page
+            resp = await context.request.get(url)
+            json_text = await resp.text()
+            if not (resp.ok and resp.headers.get("content-type", "").startswith("application/json")):
+                # Challenge pages need a real navigation to run their scripts
                 page = await context.new_page()
-                await page.goto(url, wait_until="domcontentloaded")
-
-                json_text = await page.evaluate("() => document.body.innerText")
-
                 try:
-                    data = json.loads(json_text)
-                    logger.info(f"Successfully fetched SimilarWeb data for {domain} via Playwright")
-                    return {
-                        "success": True,
-                        "site": {
-                            "site_name": data.get("SiteName", ""),
-                            "title": data.get("Title", ""),
-                            "description": data.get("Description", "")
-                        },
-                        "engagement": data.get("Engagements", {}),
-                        "traffic_sources": data.get("TrafficSources", {}),
-                        "top_country_shares": data.get("TopCountryShares", []),
-                        "estimated_monthly_visits": data.get("EstimatedMonthlyVisits", {}),
-                        "top_keywords": data.get("TopKeywords", [])
-                    }
-                except json.JSONDecodeError as e:
-                    return {"success": False, "error": f"JSON parse failed: {e}"}
+                    await page.goto(url, wait_until="domcontentloaded")
+                    json_text = await page.evaluate("() => document.body.innerText")
+                finally:
+                    await page.close()
+
+            try:
+                data = json.loads(json_text)
+                logger.info(f"Successfully fetched SimilarWeb data for {domain} via Playwright")
+                return self._format_site_data(data)
+            except json.JSONDecodeError as e:
+                return {"success": False, "error": f"JSON parse failed: {e}"}
         except Exception as e:
             return {"success": False, "error": f"Playwright error: {str(e)}"}
 
     def _save_analysis_results(self, analysis_data: Dict[str, Any], filename: str = "output/similar_web.json") -> None:
         try:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(analysis_data, f, indent=4)
+            with open(filename, "wb") as f:
+                f.write(orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2))
             logger.info(f"SimilarWeb analysis results saved to {filename}")
         except Exception as e:
             logger.error(f"Error saving results: {e}")
 
-    def analyze(self, state: "ResearchState") -> "ResearchState":
+    async def analyze(self, state: "ResearchState") -> "ResearchState":
         logger.info("Starting SimilarWeb traffic analysis...")
         print("Starting SimilarWeb traffic analysis...")
 
@@ -79,14 +142,14 @@ class SimilarWebTrafficAgent:
             state["error"] = reduce_error(state.get("error"), error_msg)
             return state
 
-        if not re.match(r'^[a-zA-Z0-9][a-zA-Z0-9-]{1,61}[a-zA-Z0-9](?:\.[a-zA-Z]{2,})+$', domain):
+        if not _DOMAIN_RE.match(domain):
             error_msg = f"Invalid domain format: {domain}"
             logger.error(error_msg)
             state["error"] = reduce_error(state.get("error"), error_msg)
             return state
 
         try:
-            similarweb_data = asyncio.run(self._playwright_fetch(domain))
+            similarweb_data = await self._fetch_json(domain)
             if not similarweb_data.get("success"):
                 error_msg = similarweb_data.get("error", "Unknown error")
                 logger.error(f"Error: {error_msg}")
@@ -1,5 +1,6 @@
-import json
-from typing import Dict, Any
+import numpy as np
+import orjson
+from typing import Any, Dict, List, Tuple
 from pydantic import BaseModel, Field
 
 # AEO Table Weights
@@ -109,6 +110,12 @@ Industry_avg = {
     'Localization': 85,
     'Social_Signals': 85
 }
+
+_MODEL_ORDER = tuple(MODEL_WEIGHTS)
+_GRADE_BINS = np.array([50, 65, 75, 85])
+_GRADES = ("D", "C", "B", "A", "A+")
+
+
 class AEOEvaluationResult(BaseModel):
     score_percentage: float
     industry_avg_percentage: float
@@ -120,87 +127,61 @@ class AEOEvaluationResult(BaseModel):
 class AEOEvaluatorAgent:
     def __init__(self, weights: Dict[str, float]):
         self.weights = weights
+        # Row 0 is the AEO weighting and rows 1.. the per-model weightings, all
+        # aligned on the same factors so every score falls out of one matmul.
+        self._factors = tuple(weights)
+        self._weight_mat = np.array(
+            [[weights[f] for f in self._factors]] +
+            [[MODEL_WEIGHTS[m].get(f, 0) for f in self._factors] for m in _MODEL_ORDER],
+            dtype=np.float64
+        )
+        self._totals = self._weight_mat.sum(axis=1) * 100
+        self._ind_scores = [Industry_avg.get(f, 0) for f in self._factors]
+        self._ind_vec = np.array(self._ind_scores, dtype=np.float64)
+        self._ind_pcts = self._weight_mat @ self._ind_vec / self._totals * 100
+
+    def _score(self, scores: Dict[str, int]) -> Tuple[List[int], np.ndarray, np.ndarray, np.ndarray]:
+        raw = [scores.get(f, 0) for f in self._factors]
+        scores_vec = np.array(raw, dtype=np.float64)
+        pcts = self._weight_mat @ scores_vec / self._totals * 100
+        return raw, scores_vec, pcts, np.digitize(pcts, _GRADE_BINS)
+
+    def _model_scores(self, pcts: np.ndarray, grades: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        return {
+            model: {
+                "score_percentage": round(float(pcts[i]), 2),
+                "industry_avg_percentage": round(float(self._ind_pcts[i]), 2),
+                "visibility_grade": _GRADES[grades[i]]
+            }
+            for i, model in enumerate(_MODEL_ORDER, start=1)
+        }
 
     def evaluate(self, scores: Dict[str, int]) -> AEOEvaluationResult:
-        print(self.weights.values())
-        total_possible = sum(weight * 100 for weight in self.weights.values())
-        weighted_sum = 0
-        ind_weighted_sum = 0
-        details = {}
-
-        for var, weight in self.weights.items():
-            score = scores.get(var, 0)
-            ind_score = Industry_avg.get(var, 0)
-            weighted_sum += score * weight
-            ind_weighted_sum += ind_score*weight
-
-            # Calculate variation only if score is not zero to avoid division by zero
-            variation = ((score - ind_score) / score * 100) if score != 0 else 0
-            
-            details[var] = {
-                "score": score,
-                "industry_avg": ind_score,
-                "variation": round(variation, 2)
+        raw, scores_vec, pcts, grades = self._score(scores)
+
+        # Calculate variation only if score is not zero to avoid division by zero
+        diff = scores_vec - self._ind_vec
+        variation = np.divide(diff, scores_vec, out=np.zeros_like(diff), where=scores_vec != 0) * 100
+        details = {
+            var: {
+                "score": raw[i],
+                "industry_avg": self._ind_scores[i],
+                "variation": round(float(variation[i]), 2) if raw[i] != 0 else 0
             }
-
-        score_percentage = (weighted_sum / total_possible) * 100
-        industry_avg_percentage=(ind_weighted_sum/total_possible)*100
-
-        if score_percentage >= 85:
-            grade = "A+"
-        elif score_percentage >= 75:
-            grade = "A"
-        elif score_percentage >= 65:
-            grade = "B"
-        elif score_percentage >= 50:
-            grade = "C"
-        else:
-            grade = "D"
-
-        model_scores = self.evaluate_all_models(scores)
+            for i, var in enumerate(self._factors)
+        }
 
         return AEOEvaluationResult(
-            score_percentage=round(score_percentage, 2),
-            industry_avg_percentage=industry_avg_percentage,
-            visibility_grade=grade,
+            score_percentage=round(float(pcts[0]), 2),
+            industry_avg_percentage=float(self._ind_pcts[0]),
+            visibility_grade=_GRADES[grades[0]],
             detailed=details,
-            model_scores=model_scores
+            model_scores=self._model_scores(pcts, grades)
         )
 
     def evaluate_all_models(self, scores: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
-        results = {}
-        for model, weights in MODEL_WEIGHTS.items():
-            total_possible = sum(w * 100 for w in weights.values())
-            weighted_sum = 0
-            ind_weighted_sum = 0
-
-            for var, weight in weights.items():
-                score = scores.get(var, 0)
-                ind_score = Industry_avg.get(var, 0)
-                weighted_sum += score * weight
-                ind_weighted_sum += ind_score * weight
-            # print(weighted_sum)
-            # print(total_possible)
-            score_pct = (weighted_sum / total_possible) * 100
-            ind_score_pct = (ind_weighted_sum / total_possible) * 100
-
-            if score_pct >= 85:
-                grade = "A+"
-            elif score_pct >= 75:
-                grade = "A"
-            elif score_pct >= 65:
-                grade = "B"
-            elif score_pct >= 50:
-                grade = "C"
-            else:
-                grade = "D"
-
-            results[model] = {
-                "score_percentage": round(score_pct, 2),
-                "industry_avg_percentage": round(ind_score_pct, 2),
-                "visibility_grade": grade
-            }
-        return results
+        _, _, pcts, grades = self._score(scores)
+        return self._model_scores(pcts, grades)
 
     def run_visibility_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         print("Running visibility node")
@@ -219,7 +200,7 @@ class AEOEvaluatorAgent:
         evaluation_result = self.evaluate(scores)
 
         state["visibility_report"] = evaluation_result.dict()
-        with open("output/visibility.json", "w") as f:
-            json.dump(evaluation_result.dict(), f, indent=4)
+        with open("output/visibility.json", "wb") as f:
+            f.write(orjson.dumps(state["visibility_report"], option=orjson.OPT_INDENT_2))
             
         return state
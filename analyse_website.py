@@ -1,20 +1,71 @@
 import os
+import re
+import enum
 import json
-import requests
+import time
+import hashlib
+import queue
+import atexit
+import asyncio
 import logging
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+import httpx
+import requests_cache
+from datetime import timedelta
+from collections import OrderedDict
+from pathlib import Path
+from typing import TypedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastapi import FastAPI, Query
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from w3lib.url import canonicalize_url
 from json import JSONDecodeError
 import google.generativeai as genai
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, DeadlineExceeded
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
-# === Configure Logging ===
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
+_STRIPPED_TAGS = ("script", "style", "header", "footer", "nav")
+
+# Each page contributes at most this many prompt tokens, estimated at ~4
+# characters per token so trimming needs no extra API round trip
+PAGE_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]+")
+# Pages whose 5-word shingles overlap at least this much are treated as copies
+DUPLICATE_SIMILARITY = 0.85
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the "
+    "this to was we were will with you your all can more not".split()
 )
+
+# === Configure Logging ===
+# Records are queued by the calling thread or task and written by a listener
+# thread, so handler I/O never blocks the event loop. Each record carries the
+# run id of the request that produced it.
+run_id: ContextVar[str] = ContextVar("run_id", default="-")
+
+class _RunIdFilter(logging.Filter):
+    def filter(self, record):
+        record.run_id = run_id.get()
+        return True
+
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(run_id)s | %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_output)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_log_handler = QueueHandler(_log_queue)
+_log_handler.addFilter(_RunIdFilter())
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(_log_handler)
+logger.propagate = False
 
 # === Load environment variables ===
 load_dotenv()
@@ -26,14 +77,45 @@ if not SERPAPI_KEY or not GOOGLE_API_KEY:
 
 # === Configure Gemini ===
 genai.configure(api_key=GOOGLE_API_KEY)
-gemini = genai.GenerativeModel("gemini-2.0-flash")
+# Caps in-flight Gemini calls so concurrent requests stay under the RPM quota
+GEMINI_CONCURRENCY = 8
+_gemini_slots = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+# === Shared HTTP session ===
+# Keeps the connection to SerpAPI alive across searches and caches results on
+# disk for an hour, so re-running the same domain doesn't spend search credits
+USER_AGENT = "Mozilla/5.0 (compatible; SurfGEO/1.0)"
+CACHE_DIR = "cache"
+session = requests_cache.CachedSession(
+    os.path.join(CACHE_DIR, "serpapi"),
+    backend="sqlite",
+    expire_after=timedelta(hours=1)
+)
+session.headers["User-Agent"] = USER_AGENT
+adapter = HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+# Upper bound on pages fetched at once, across all concurrent requests
+SCRAPE_CONCURRENCY = 64
+# Extracted page text is kept on disk for six hours, keyed by URL, so
+# re-analysing a domain doesn't download its pages again. Only the capped,
+# parsed result is stored, never the raw response.
+PAGE_CACHE_DIR = Path(CACHE_DIR, "page_text")
+PAGE_CACHE_TTL = timedelta(hours=6)
+# Decoded bytes read per page before the rest of the body is abandoned
+MAX_PAGE_BYTES = 512 * 1024
 
 # === Initialize FastAPI ===
 app = FastAPI(title="SEO Keyword Analyzer API")
 
 # === 1. Google Search with SerpAPI ===
-def search_google(domain, num_results=10):
-    logger.info(f"🔍 Searching Google for site:{domain}")
+def search_google(domain, num_results=10, fresh=False):
+    logger.info("🔍 Searching Google for site:%s", domain)
     try:
         query = f"site:{domain}"
         url = "https://serpapi.com/search"
@@ -43,47 +125,201 @@ def search_google(domain, num_results=10):
             "api_key": SERPAPI_KEY,
             "num": num_results
         }
-        res = requests.get(url, params=params)
+        res = session.get(url, params=params, force_refresh=fresh)
         results = res.json().get("organic_results", [])
         links = [r.get("link") for r in results if "link" in r][:num_results]
-        logger.info(f"✅ Found {len(links)} result(s)")
+        logger.info("✅ Found %s result(s)", len(links))
         return links
     except Exception as e:
-        logger.error(f"❌ Error during Google search: {e}")
+        logger.error("❌ Error during Google search: %s", e)
         return []
 
 # === 2. Scrape a Webpage ===
-def scrape(url):
+def page_text(content: bytes, encoding=None):
+    # Hand libxml2 the raw bytes so it sniffs the charset itself; only a
+    # charset the server declared explicitly is passed through.
+    parser = lxml_html.HTMLParser(encoding=encoding) if encoding else None
+    root = lxml_html.fromstring(content, parser=parser)
+    for el in list(root.iter(etree.Comment, *_STRIPPED_TAGS)):
+        el.clear(keep_tail=True)
+    return condense(" ".join(t.strip() for t in root.itertext() if t.strip()))
+
+def condense(text, token_budget=PAGE_TOKEN_BUDGET):
+    """Keep the most informative sentences of `text` that fit in `token_budget`.
+
+    Repeated sentences (menus, cookie banners, footers) are dropped, the rest
+    are ranked by how many distinct non-stopwords they carry and picked
+    greedily, then joined back in their original order. A "sentence" longer
+    than the whole budget (CJK punctuation, unpunctuated text) is cut to the
+    budget still left instead of being skipped.
+    """
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    seen = set()
+    candidates = []
+    for i, sentence in enumerate(_SENTENCE_END.split(text)):
+        key = sentence.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append((len(set(_WORD.findall(key)) - _STOPWORDS), i, sentence))
+    picked = []
+    used = 0
+    for _, i, sentence in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        room = max_chars - used - 1
+        if len(sentence) > max_chars:
+            sentence = sentence[:room]
+        if sentence and len(sentence) <= room:
+            picked.append((i, sentence))
+            used += len(sentence) + 1
+    return " ".join(sentence for _, sentence in sorted(picked)) or text[:max_chars]
+
+def _page_cache_path(url) -> Path:
+    return PAGE_CACHE_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.txt"
+
+def _cached_page(url):
+    path = _page_cache_path(url)
     try:
-        r = requests.get(url, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        for tag in soup(["script", "style", "header", "footer", "nav"]):
-            tag.decompose()
-        logger.info(f"✅ Scraped content from {url}")
-        return soup.get_text(separator=" ", strip=True)[:8000]
+        if time.time() - path.stat().st_mtime < PAGE_CACHE_TTL.total_seconds():
+            return path.read_text(encoding="utf-8")
+    except OSError:
+        pass
+    return None
+
+def _cache_page(url, text):
+    try:
+        PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _page_cache_path(url).write_text(text, encoding="utf-8")
+    except OSError as e:
+        logger.warning("⚠️ Could not cache page %s: %s", url, e)
+
+async def scrape(client: httpx.AsyncClient, url, fresh=False):
+    if not fresh and (text := _cached_page(url)) is not None:
+        logger.info("♻️ Using cached content for %s", url)
+        return text
+    try:
+        async with client.stream("GET", url) as r:
+            # Headers arrive before the body and nothing below the client reads
+            # ahead, so PDFs, images and other non-HTML results are dropped
+            # without downloading them. The skip is cached as empty text so the
+            # same file isn't requested again.
+            content_type = r.headers.get("Content-Type", "").lower()
+            if content_type and "html" not in content_type:
+                logger.info("⏭️ Skipping non-HTML result %s (%s)", url, content_type)
+                if r.is_success:
+                    _cache_page(url, "")
+                return ""
+            # Stop reading once we have more than condense() could ever keep;
+            # leaving the block closes the connection on the unread remainder
+            body = bytearray()
+            async for chunk in r.aiter_bytes():
+                body += chunk
+                if len(body) >= MAX_PAGE_BYTES:
+                    break
+        # lxml releases the GIL while parsing, so this doesn't stall the event loop
+        text = await asyncio.to_thread(page_text, bytes(body), r.charset_encoding)
+        if r.is_success:
+            _cache_page(url, text)
+        logger.info("✅ Scraped content from %s", url)
+        return text
     except Exception as e:
-        logger.warning(f"❌ Error scraping {url}: {e}")
+        logger.warning("❌ Error scraping %s: %s", url, e)
         return ""
 
-# === 3. Scrape All in Parallel ===
-def scrape_all(urls):
-    texts = []
-    logger.info("🚀 Starting parallel scraping...")
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(scrape, url): url for url in urls}
-        for future in as_completed(futures):
-            url = futures[future]
-            try:
-                texts.append(future.result())
-            except Exception as e:
-                logger.warning(f"❌ Failed: {url} — {e}")
-    logger.info(f"🧹 Scraping completed. Total pages scraped: {len(texts)}")
-    return "\n".join(texts)
+# === 3. Scrape All Concurrently ===
+_page_client = None
+
+def page_client():
+    """Return the page-fetching client shared by every request, creating it on first use.
+
+    Sharing it keeps connections (and TLS sessions) to recently scraped hosts
+    alive between /analyze calls.
+    """
+    global _page_client
+    if _page_client is None or _page_client.is_closed:
+        # A plain client rather than a caching one: a caching transport reads
+        # every body in full before returning, which would defeat the size cap
+        _page_client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=10,
+            follow_redirects=True,
+            # The client ignores its own limits= once a transport is passed, so they go here
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                limits=httpx.Limits(max_connections=SCRAPE_CONCURRENCY, max_keepalive_connections=SCRAPE_CONCURRENCY),
+            )
+        )
+    return _page_client
+
+async def close_page_client():
+    if _page_client is not None:
+        await _page_client.aclose()
+
+def _page_key(url):
+    # Scheme, "www.", trailing slashes, fragments and query order don't change
+    # which page a URL names
+    host_and_path = canonicalize_url(url).split("://", 1)[-1].rstrip("/").lower()
+    return host_and_path[4:] if host_and_path.startswith("www.") else host_and_path
+
+def unique_urls(urls):
+    seen = set()
+    unique = []
+    for url in urls:
+        key = _page_key(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+def _shingles(text):
+    words = text.lower().split()
+    return {hash(tuple(words[i:i + 5])) for i in range(max(len(words) - 4, 1))}
+
+def join_distinct(texts, threshold=DUPLICATE_SIMILARITY):
+    """Join page texts, skipping empty pages and near-copies of earlier ones."""
+    kept = []
+    kept_shingles = []
+    for text in texts:
+        if not text:
+            continue
+        shingles = _shingles(text)
+        if any(len(shingles & other) >= threshold * len(shingles | other) for other in kept_shingles):
+            continue
+        kept.append(text)
+        kept_shingles.append(shingles)
+    if len(kept) < len(texts):
+        logger.info("🧹 Dropped %s empty or duplicate page(s)", len(texts) - len(kept))
+    return "\n".join(kept)
+
+async def search_and_scrape(domain, fresh=False):
+    """Search the domain and scrape its results, overlapping the two.
+
+    The homepage is nearly always among the results, so its fetch starts while
+    SerpAPI is still answering; if the search returns it, that fetch is reused.
+    Returns the result URLs and the joined page text.
+    """
+    client = page_client()
+    home_url = f"https://{domain}/"
+    home = asyncio.create_task(scrape(client, home_url, fresh))
+    urls = unique_urls(await asyncio.to_thread(search_google, domain, fresh=fresh))
+    home_used = False
+    tasks = []
+    for url in urls:
+        if not home_used and _page_key(url) == _page_key(home_url):
+            tasks.append(home)
+            home_used = True
+        else:
+            tasks.append(asyncio.create_task(scrape(client, url, fresh)))
+    if not home_used:
+        home.cancel()
+        await asyncio.gather(home, return_exceptions=True)
+    texts = await asyncio.gather(*tasks)
+    logger.info("🧹 Scraping completed. Total pages scraped: %s", len(texts))
+    return urls, join_distinct(texts)
 
 # === 4. Analyze Keywords using Gemini ===
-def analyze_keywords(text: str):
-    logger.info("🧠 Analyzing keywords using Gemini...")
-    prompt = f"""
+KEYWORD_INSTRUCTIONS = """
 You are a keyword analysis expert.
 
 From the website content below, extract 5 important SEO keywords or phrases (Not based on frequency).
@@ -98,33 +334,129 @@ Base your ratings on:
 - SEO relevance
 - Originality
 - Search competitiveness
+"""
+
+# The instructions never change, so they are sent as the model's system
+# instruction and each call carries only the page text
+KEYWORD_MODEL_NAME = "gemini-2.0-flash"
+keyword_model = genai.GenerativeModel(KEYWORD_MODEL_NAME, system_instruction=KEYWORD_INSTRUCTIONS)
+
+# Parsed Gemini replies are kept on disk for a week, keyed by everything that
+# shapes the answer, so re-analysing the same text costs no tokens
+GEMINI_CACHE_DIR = Path(CACHE_DIR, "gemini")
+GEMINI_CACHE_TTL = timedelta(days=7)
 
-🎯 Output format (valid JSON only):
+def _gemini_cache_path(prompt: str, schema) -> Path:
+    key = "|".join((KEYWORD_MODEL_NAME, KEYWORD_INSTRUCTIONS, repr(schema), prompt))
+    return GEMINI_CACHE_DIR / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
 
-[
-  {{ "keyword": "keyword1", "rating": "Poor" }},
-  {{ "keyword": "keyword2", "rating": "Poor" }},
-  {{ "keyword": "keyword3", "rating": "Average" }},
-  {{ "keyword": "keyword4", "rating": "Average" }},
-  {{ "keyword": "keyword5", "rating": "Excellent" }}
-]
+class Rating(enum.Enum):
+    POOR = "Poor"
+    AVERAGE = "Average"
+    EXCELLENT = "Excellent"
 
-Do not include any explanation or markdown. Just return pure JSON.
+class KeywordRating(TypedDict):
+    keyword: str
+    rating: Rating
 
-Text:
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable, DeadlineExceeded)),
+    reraise=True
+)
+async def _call_gemini(prompt: str, schema):
+    # Gemini returns bare JSON matching the schema, so no output-format prose
+    # or code-fence stripping is needed. Quota and availability errors are
+    # retried with backoff; anything else goes straight to the caller.
+    async with _gemini_slots:
+        response = await keyword_model.generate_content_async(
+            prompt,
+            generation_config=genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=schema
+            ),
+            request_options={"timeout": 30}
+        )
+    return json.loads(response.text)
+
+async def _generate_json(prompt: str, schema):
+    path = _gemini_cache_path(prompt, schema)
+    try:
+        if time.time() - path.stat().st_mtime < GEMINI_CACHE_TTL.total_seconds():
+            logger.info("♻️ Using cached Gemini response.")
+            return json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        pass
+    result = await _call_gemini(prompt, schema)
+    try:
+        GEMINI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(result), encoding="utf-8")
+    except OSError as e:
+        logger.warning("⚠️ Could not cache Gemini response: %s", e)
+    return result
+
+async def analyze_keywords(text: str):
+    logger.info("🧠 Analyzing keywords using Gemini...")
+    prompt = f"""Text:
 \"\"\"{text}\"\"\"
 """
     try:
-        response = gemini.generate_content(prompt)
-        output = response.text.strip()
-        if output.startswith("```json"):
-            output = output.replace("```json", "").replace("```", "").strip()
-        keywords = json.loads(output)
+        keywords = await _generate_json(prompt, list[KeywordRating])
         logger.info("✅ Gemini keyword analysis complete.")
         return keywords
     except JSONDecodeError as e:
-        logger.error(f"❌ JSON decode error: {e}")
+        logger.error("❌ JSON decode error: %s", e)
         return []
     except Exception as e:
-        logger.error(f"❌ Gemini output error: {e}")
-        return []
\ No newline at end of file
+        logger.error("❌ Gemini output error: %s", e)
+        return []
+
+# === 5. Analyze a Domain ===
+# Finished analyses are kept in memory for ten minutes, keyed by the normalised
+# domain, and concurrent requests for the same domain share one in-flight run
+DOMAIN_CACHE_TTL = timedelta(minutes=10)
+DOMAIN_CACHE_SIZE = 1024
+_domain_results = OrderedDict()
+
+async def _analyze_domain(domain, fresh):
+    urls, all_text = await search_and_scrape(domain, fresh=fresh)
+    if not urls:
+        return {"error": "No pages found."}
+    if not all_text:
+        return {"error": "No content could be scraped."}
+    return {"domain": domain, "keywords": await analyze_keywords(all_text)}
+
+def _forget_domain(key, task):
+    # Only drop the entry if a newer run hasn't replaced it meanwhile
+    if key in _domain_results and _domain_results[key][1] is task:
+        del _domain_results[key]
+
+async def analyze_domain(domain, fresh=False):
+    """Search, scrape and analyse `domain`, reusing a recent or in-flight result.
+
+    `fresh` always starts a new run, which then replaces the cached one. Errors
+    and empty keyword lists are not kept.
+    """
+    key = domain.strip().lower()
+    now = time.monotonic()
+    entry = _domain_results.get(key)
+    if fresh or entry is None or entry[0] <= now:
+        task = asyncio.create_task(_analyze_domain(key, fresh))
+        _domain_results[key] = (now + DOMAIN_CACHE_TTL.total_seconds(), task)
+        if len(_domain_results) > DOMAIN_CACHE_SIZE:
+            _domain_results.popitem(last=False)
+    else:
+        task = entry[1]
+        logger.info("♻️ Reusing analysis for %s", key)
+    _domain_results.move_to_end(key)
+
+    # Shielded so one client disconnecting doesn't cancel a run others await
+    try:
+        result = await asyncio.shield(task)
+    except Exception:
+        _forget_domain(key, task)
+        raise
+    if "error" in result or not result["keywords"]:
+        _forget_domain(key, task)
+    return result
@@ -1,7 +1,8 @@
 import os
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import List, Dict, Any, Optional, AsyncIterator
 from langgraph.graph import StateGraph, END
 
 # Configure logging
@@ -29,8 +30,8 @@ class ResearchController:
         try:
             logger.info("Initializing ResearchController...")
             
-            # Initialize all agents
-            self.scrapper_agent = ScraperAgent()
+            # Initialize all agents. The scraper keeps per-crawl state (visited set,
+            # rejected URLs), so the scrape node creates one per run instead.
             self.periodic_table_agent = PeriodicTableAgent()
             self.compatibility_agent = CompatibilityAgent()
             
@@ -63,7 +64,7 @@ class ResearchController:
             logger.error(f"Error initializing ResearchController: {e}")
             raise
 
-    def run_similar_web_analysis_node(self, state: ResearchState) -> ResearchState:
+    async def run_similar_web_analysis_node(self, state: ResearchState) -> ResearchState:
         logger.info(f"--- Initiating SimilarWeb Analysis Node for URL: {state['company_name']} ---")
         try:
             # Assuming company_name can be used as a URL/domain for similarweb
@@ -72,7 +73,7 @@ class ResearchController:
                 logger.warning("SimilarWeb Analysis Node: Company name not found.")
                 return state
 
-            state = self.similar_web_agent.analyze(state)
+            state = await self.similar_web_agent.analyze(state)
             return state
         except Exception as e:
             logger.error(f"Error in SimilarWeb Analysis Node: {e}")
@@ -88,7 +89,7 @@ class ResearchController:
                 logger.warning("Scrape Website Node: Company name not found.")
                 return state
 
-            state = await self.scrapper_agent.scrape_website(state)
+            state = await ScraperAgent().scrape_website(state)
             if state.get('website_content'):
                 logger.info("Scrape Website Node completed successfully.")
             else:
@@ -119,11 +120,12 @@ class ResearchController:
             # Define the workflow edges
             self.workflow.set_entry_point("scrape_website")
             
+            # Everything scraping fans out to runs concurrently in the next step; every
+            # state key has a reducer in ResearchState, so their updates merge.
             # Add edge for compatibility analysis after scraping
             self.workflow.add_edge("scrape_website", "audit_analysis")
             self.workflow.add_edge("scrape_website", "compatibility_analysis")
             
-            # First parallel branch: brand identity and keyword research
             # First parallel branch: brand identity and keyword research
             self.workflow.add_edge("scrape_website", "brand_identity")
             self.workflow.add_edge("brand_identity", "keyword_research")
@@ -138,12 +140,13 @@ class ResearchController:
             self.workflow.add_edge("periodic_table_analysis", "visibility_analysis")
             # self.workflow.add_edge("visibility_analysis", "similar_web_analysis")
             
-            # Brand analytics should run only after both visibility_analysis and periodic_table_analysis complete
-            # First, create a conditional edge from periodic_table_analysis to brand_analytics
-            # Then ensure visibility_analysis also points to brand_analytics
-            self.workflow.add_edge("visibility_analysis", "brand_analytics")
-            self.workflow.add_edge("industry_analysis", "brand_analytics")
-            self.workflow.add_edge("similar_web_analysis", "brand_analytics")
+            # Brand analytics joins the branches: a single edge from all three sources
+            # makes it wait for every one of them, whereas separate edges would run
+            # it once per branch as each finished
+            self.workflow.add_edge(
+                ["visibility_analysis", "industry_analysis", "similar_web_analysis"],
+                "brand_analytics"
+            )
             
             # Set the final node
             self.workflow.set_finish_point("brand_analytics")
@@ -154,6 +157,85 @@ class ResearchController:
             logger.error(f"Failed to set up workflow: {str(e)}")
             raise
 
+def to_serializable(value: Any) -> Any:
+    """Fallback for orjson: Pydantic models become dicts, anything else a string."""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if hasattr(value, 'dict'):
+        return value.dict()
+    return str(value)
+
+
+# Built on first use and shared by every run: constructing the agents and
+# compiling the graph is far more expensive than a single invocation.
+_controller: Optional[ResearchController] = None
+_app = None
+
+
+def get_workflow():
+    """Return the compiled research workflow, building it on first call."""
+    global _controller, _app
+    if _app is None:
+        _controller = ResearchController()
+        logger.info("Compiling workflow...")
+        _app = _controller.workflow.compile()
+    return _app
+
+
+def _initial_state(company_name: str) -> ResearchState:
+    # company_name is the only caller-supplied value; every other key starts
+    # out empty, so the state is built directly instead of being round-tripped
+    # through ResearchStateModel
+    if not isinstance(company_name, str):
+        raise ValueError(f"Invalid initial state: company_name must be a string, got {type(company_name).__name__}")
+    
+    return {
+        'company_name': company_name,
+        'scraped_summary': None,
+        'website_content_individual': None,
+        'brand_guidelines': None,
+        'periodic_table_report': None,
+        'seo_keywords': None,
+        'prompt_report': None,
+        'unique_competitors': None,
+        'ranking_analysis_output': None,
+        'visibility_report': None,
+        'brand_metrics': None,
+        'similar_web_data': None,
+        'niche': None,
+        'industry': None,
+        'goals': None,
+        'usp': None,
+        'error': None,
+        'website_content': None,
+        'compatibility_report': None,
+        'audit_report': None
+    }
+
+
+def _save_results(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def _write_results(final_state: Dict[str, Any]) -> None:
+    """Save the final state to output/final_results.json; failures are only logged."""
+    os.makedirs("output", exist_ok=True)
+    output_path = os.path.join("output", "final_results.json")
+    
+    try:
+        # orjson only calls to_serializable for values it can't encode itself;
+        # the file write happens off the event loop
+        await asyncio.to_thread(_save_results, output_path, orjson.dumps(
+            final_state,
+            default=to_serializable,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ))
+        logger.info(f"Research workflow completed successfully! Results saved to {output_path}")
+    except Exception as e:
+        logger.error(f"Error saving results: {str(e)}")
+
+
 async def run_workflow(company_name: str = "example.com") -> Dict[str, Any]:
     """
     Run the complete research workflow for a given company.
@@ -167,77 +249,17 @@ async def run_workflow(company_name: str = "example.com") -> Dict[str, Any]:
     try:
         logger.info(f"Starting research workflow for: {company_name}")
         
-        # Initialize the controller
-        controller = ResearchController()
-        
-        # Create initial state with proper structure for LangGraph
-        from agents.schemas import ResearchState, ResearchStateModel
-        
-        # Initialize the state as a dictionary with all required keys
-        initial_state: ResearchState = {
-            'company_name': company_name,
-            'scraped_summary': None,
-            'brand_guidelines': None,
-            'periodic_table_report': None,
-            'seo_keywords': None,
-            'prompt_report': None,
-            'unique_competitors': None,
-            'ranking_analysis_output': None,
-            'visibility_report': None,
-            'brand_metrics': None,
-            'similar_web_data': None,
-            'niche': None,
-            'industry': None,
-            'goals': None,
-            'usp': None,
-            'error': None,
-            'website_content': None,
-            'compatibility_report': None,
-            'audit_report': None
-        }
-        
-        # Validate the initial state against the Pydantic model
-        try:
-            validated_state = ResearchStateModel(**initial_state)
-            initial_state = validated_state.dict()
-        except Exception as e:
-            logger.error(f"Invalid initial state: {str(e)}")
-            raise ValueError(f"Invalid initial state: {str(e)}")
-        
-        # Compile the workflow
-        logger.info("Compiling workflow...")
-        app = controller.workflow.compile()
+        # Reuse the shared controller and compiled graph
+        app = get_workflow()
+        initial_state = _initial_state(company_name)
         
         # Run the workflow
         logger.info("Executing workflow...")
         final_state = await app.ainvoke(initial_state)
         
-        # Save results
-        os.makedirs("output", exist_ok=True)
-        output_path = os.path.join("output", "final_results.json")
-        
-        try:
-            # Convert the final state to a serializable format
-            serializable_state = {}
-            for key, value in final_state.items():
-                if hasattr(value, 'dict'):
-                    serializable_state[key] = value.dict()
-                elif isinstance(value, (list, dict, str, int, float, bool, type(None))):
-                    serializable_state[key] = value
-                else:
-                    serializable_state[key] = str(value)
-            
-            # Save to file
-            with open(output_path, "w", encoding='utf-8') as f:
-                json.dump(serializable_state, f, indent=2, ensure_ascii=False, default=str)
-                
-            logger.info(f"Research workflow completed successfully! Results saved to {output_path}")
-            return final_state
-            
-        except Exception as e:
-            logger.error(f"Error saving results: {str(e)}")
-            # Return the final state even if saving fails
-            return final_state
+        # Save results; the final state is returned even if saving fails
+        await _write_results(final_state)
+        return final_state
         
     except Exception as e:
         error_msg = f"Error in research workflow: {str(e)}"
@@ -246,6 +268,41 @@ async def run_workflow(company_name: str = "example.com") -> Dict[str, Any]:
         print("Research workflow failed. Check the logs for more details.")
         return {"error": error_msg}
 
+
+async def stream_workflow(company_name: str = "example.com") -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the research workflow, yielding each agent's results as soon as it finishes.
+    
+    Yields:
+        {"stage": <node name>, "data": <state keys the node changed>} per node,
+        then {"stage": "done", "data": None}, or {"stage": "error", "data": <message>}
+    """
+    try:
+        logger.info(f"Starting streamed research workflow for: {company_name}")
+        app = get_workflow()
+        state = _initial_state(company_name)
+        
+        # "values" snapshots are the state after the graph's reducers merged
+        # each step, so the last one is exactly what ainvoke would return.
+        # Nodes hand back the whole state, so of each "updates" chunk only the
+        # keys that differ from the latest snapshot are sent on.
+        async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+            if mode == "values":
+                state = chunk
+                continue
+            for stage, node_state in chunk.items():
+                changed = {k: v for k, v in (node_state or {}).items() if state.get(k) is not v}
+                yield {"stage": stage, "data": changed}
+        
+        await _write_results(state)
+        yield {"stage": "done", "data": None}
+        
+    except Exception as e:
+        error_msg = f"Error in research workflow: {str(e)}"
+        logger.error(error_msg)
+        yield {"stage": "error", "data": error_msg}
+
+
 if __name__ == "__main__":
     try:
         # Ask for user input at runtime
@@ -254,7 +311,7 @@ if __name__ == "__main__":
             raise ValueError("Company name cannot be empty.")
         
         # Run the workflow
-        final_state = run_workflow(company_name=company_name)
+        final_state = asyncio.run(run_workflow(company_name=company_name))
         
         # Print summary of results
         print("\n" + "="*50)
@@ -1,31 +1,125 @@
-from fastapi import FastAPI, HTTPException, Query
+import os
+import sys
+import uuid
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any
-from controller import run_workflow  # Import your LangGraph-based controller logic
-from analyse_website import search_google, scrape_all, analyze_keywords
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from typing import Annotated
+from pydantic import BaseModel, StringConstraints
+from controller import get_workflow, run_workflow, stream_workflow, to_serializable  # Import your LangGraph-based controller logic
+from agents.similar_web_analysis import SimilarWebTrafficAgent
+from agents.scrapper_agent import close_parse_pool
+
+# The controller and agents log through the root logger; its handlers are moved
+# behind a queue so their writes happen on a listener thread, not the event loop
+_root_logger = logging.getLogger()
+if _root_logger.handlers:
+    _log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+    _root_logger.handlers = [QueueHandler(_log_queue)]
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the agents and compile the graph once, before the first request;
+    # the handlers fetch it from get_workflow()'s cache. If this fails, /run
+    # retries on demand and reports the error
+    try:
+        get_workflow()
+    except Exception as e:
+        logger.warning("⚠️ Workflow warm-up failed: %s", e)
+    yield
+    await SimilarWebTrafficAgent.close()
+    await close_parse_pool()
+    # Only loaded if /analyze was ever called
+    if "analyse_website" in sys.modules:
+        await _analyse_website().close_page_client()
+
+
+@lru_cache(maxsize=1)
+def _analyse_website():
+    # /analyze's search, cache and retry clients (and its log listener) are
+    # imported on its first call, so workers serving only /run never load them
+    import analyse_website
+    return analyse_website
+
 
 app = FastAPI(
     title="AI Research Workflow API",
     description="Trigger full research analysis using autonomous agents.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# 👇 Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 🔐 For production, replace "*" with specific domain(s)
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Error bodies go through orjson as well; FastAPI's built-in handlers always
+# answer with the stdlib-json JSONResponse
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return ORJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
+
+# 👇 Add CORS middleware: CORS_ORIGINS is a comma-separated allow-list
+# (default "*"); set it to an empty string when a reverse proxy in front of the
+# app adds the CORS headers, so requests skip the middleware entirely
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,  # 🔐 For production, replace "*" with specific domain(s)
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+
+# Rejected with a 422 before any search, scrape or Gemini call is made
+_HOST = r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+"
+DOMAIN_PATTERN = rf"^{_HOST}$"
+# company_name is the site to research; a scheme, port and path are allowed
+SITE_PATTERN = rf"^(?:https?://)?{_HOST}(?::\d{{1,5}})?(?:/\S*)?$"
 
 
 class ResearchRequest(BaseModel):
-    company_name: str
+    company_name: Annotated[str, StringConstraints(strip_whitespace=True, max_length=2048, pattern=SITE_PATTERN)]
 
 
-@app.post("/run", summary="Run full AI research workflow", response_model=Dict[str, Any])
+class WorkflowResponse(ORJSONResponse):
+    """Serialises the final state straight through orjson, skipping FastAPI's
+    jsonable_encoder/response_model pass; agent outputs that are still
+    Pydantic models fall back to to_serializable."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=to_serializable,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+@app.post("/run", summary="Run full AI research workflow", response_class=WorkflowResponse)
 async def run_research(request: ResearchRequest):
     try:
         result = await run_workflow(company_name=request.company_name)
@@ -33,23 +127,33 @@ async def run_research(request: ResearchRequest):
         if result.get("error"):
             raise HTTPException(status_code=500, detail=result["error"])
 
-        return result
+        return WorkflowResponse(result)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Workflow failed: {str(e)}")
 
+@app.post("/run/stream", summary="Run the research workflow, streaming each agent's results")
+async def run_research_stream(request: ResearchRequest):
+    # One JSON object per line (NDJSON) as each agent finishes, so clients see
+    # the first results long before the whole workflow completes
+    async def lines():
+        async for chunk in stream_workflow(company_name=request.company_name):
+            yield orjson.dumps(
+                chunk,
+                default=to_serializable,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+            )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.get("/analyze")
-def analyze(domain: str = Query(..., description="Website domain (e.g., example.com)")):
-    print(f"🔍 Searching Google for: {domain}")
-    urls = search_google(domain)
-    if not urls:
-        return {"error": "No pages found."}
-
-    print("⚡ Scraping in parallel...")
-    all_text = scrape_all(urls)
-    if not all_text:
-        return {"error": "No content could be scraped."}
-
-    print("🧠 Sending to Gemini...")
-    result = analyze_keywords(all_text)
-    return {"domain": domain, "keywords": result}
+async def analyze(
+    domain: str = Query(..., max_length=253, pattern=DOMAIN_PATTERN, description="Website domain (e.g., example.com)"),
+    fresh: bool = Query(False, description="Bypass cached search results and pages")
+):
+    website = _analyse_website()
+    # Tags every log record of this request, including those from worker threads
+    website.run_id.set(uuid.uuid4().hex[:8])
+    # Queued to analyse_website's listener thread, never written on the event loop
+    website.logger.info("🔍 Searching Google and scraping results for: %s", domain)
+    return await website.analyze_domain(domain, fresh=fresh)
@@ -3,4 +3,9 @@ echo "✅ Installing Chromium for Playwright..."
 playwright install chromium
 
 echo "🚀 Starting FastAPI..."
-exec uvicorn main:app --host 0.0.0.0 --port 10000
\ No newline at end of file
+# One worker process per CPU by default (WEB_CONCURRENCY overrides it). Each
+# worker runs its own Chromium and caches, so memory rather than CPU is the
+# limit; requests beyond LIMIT_CONCURRENCY per worker get a 503.
+WORKERS="${WEB_CONCURRENCY:-$(nproc)}"
+exec uvicorn main:app --host 0.0.0.0 --port 10000 --loop uvloop --http httptools \
+    --workers "$WORKERS" --limit-concurrency "${LIMIT_CONCURRENCY:-100}" --backlog 2048
\ No newline at end of file